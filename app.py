@@ -1,32 +1,32 @@
 # app.py
 import os
+import re
 import json
 import random
 import traceback
-from textblob import TextBlob
-import csv
 from flask import Flask, render_template, request, jsonify
-from model_utils import load_dataset, build_and_train, load_model, fallback_sample, DEFAULT_CSV_PATH
+from flask_caching import Cache
+from model_utils import load_or_train, DEFAULT_CSV_PATH, MoodPredictor
+from batching import DynamicBatcher
+import sentiment
+from sentiment import analyze_sentiment_batch
+from feedback_log import FeedbackLogWriter
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='static', template_folder='templates')
+cache = Cache(app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 3600})
 
 # Paths for model and label encoder
 MODEL_PATH = "models/mood_model.joblib"
 LE_PATH = "models/label_encoder.joblib"
 
 FEEDBACK_LOG = "data/feedback_log.csv"
+feedback_writer = FeedbackLogWriter(FEEDBACK_LOG)
+# Concurrent /feedback requests share one lexicon scoring pass
+analyze_sentiment = DynamicBatcher(analyze_sentiment_batch, max_batch_size=64, max_latency_ms=20)
 
-def analyze_sentiment(feedback_text):
-    """Analyze sentiment polarity of feedback."""
-    blob = TextBlob(feedback_text)
-    polarity = blob.sentiment.polarity
-    if polarity > 0.1:
-        return "positive"
-    elif polarity < -0.1:
-        return "negative"
-    else:
-        return "neutral"
+# If set (e.g. http://127.0.0.1:8000), /chat delegates inference to inference_server.py
+INFERENCE_URL = os.environ.get("INFERENCE_URL")
 
 # --- Helper: map detected label to a broad mood category ---
 BROAD_MAPPINGS = {
@@ -39,71 +39,107 @@ BROAD_MAPPINGS = {
     'disgust': {'syn': {'disgust','disgusted','repulsed'}},
 }
 
+# One named group per broad mood, so a single scan yields the category
+_BROAD_RE = re.compile("|".join(
+    f"(?P<{broad}>{'|'.join(map(re.escape, sorted(info['syn'], key=len, reverse=True)))})"
+    for broad, info in BROAD_MAPPINGS.items()
+))
+
 def to_broad(mood_label):
     """Map a specific mood label to a broad category."""
     if mood_label is None:
         return 'neutral'
-    ml = str(mood_label).lower()
-    for broad, info in BROAD_MAPPINGS.items():
-        for s in info['syn']:
-            if s in ml:
-                return broad
-    return 'neutral'
+    m = _BROAD_RE.search(str(mood_label).lower())
+    return m.lastgroup if m else 'neutral'
+
+# Reply templates per broad mood, built once at import
+REPLY_TEMPLATES = {
+    'happy': (
+        "That's wonderful to hear! 😊 Tell me more!",
+        "Love that energy — what's making you smile today?",
+        "Great! Keep it up — anything fun going on?"
+    ),
+    'sad': (
+        "I'm sorry you're feeling down. Do you want to talk about it?",
+        "That sounds tough. I'm here for you — what's on your mind?",
+        "I hear you. Small steps can help — would you like breathing tips?"
+    ),
+    'angry': (
+        "I can tell you're upset. Want to vent or find a solution together?",
+        "That's frustrating — tell me what happened and we'll work it out.",
+        "Anger is valid. Do you want some ways to calm down right now?"
+    ),
+    'neutral': (
+        "Thanks for sharing. Anything else you'd like to add?",
+        "Got it. Want to dive deeper or change the topic?",
+        "Okay — how can I help further?"
+    ),
+    'fear': (
+        "That sounds scary. Do you want to describe what's worrying you?",
+        "I'm here with you — would you like some coping suggestions?",
+        "It's okay to be nervous. Want grounding or breathing exercise ideas?"
+    ),
+    'surprise': (
+        "Wow — that is surprising! Tell me more!",
+        "That's unexpected — how do you feel about it?",
+        "Interesting! What happened next?"
+    ),
+    'disgust': (
+        "That sounds unpleasant. Want to talk about it?",
+        "I get why you'd feel that way. Do you want a change of topic?",
+        "Ugh — I hear you. Anything I can do to help?"
+    ),
+}
+_BROAD_INDEX = {broad: i for i, broad in enumerate(REPLY_TEMPLATES)}
+_TEMPLATES = tuple(REPLY_TEMPLATES.values())
+_NEUTRAL_IDX = _BROAD_INDEX['neutral']
 
 def generate_reply(broad_mood, user_text):
     """Generate a reply based on broad mood."""
-    templates = {
-        'happy': [
-            "That's wonderful to hear! 😊 Tell me more!",
-            "Love that energy — what's making you smile today?",
-            "Great! Keep it up — anything fun going on?"
-        ],
-        'sad': [
-            "I'm sorry you're feeling down. Do you want to talk about it?",
-            "That sounds tough. I'm here for you — what's on your mind?",
-            "I hear you. Small steps can help — would you like breathing tips?"
-        ],
-        'angry': [
-            "I can tell you're upset. Want to vent or find a solution together?",
-            "That's frustrating — tell me what happened and we'll work it out.",
-            "Anger is valid. Do you want some ways to calm down right now?"
-        ],
-        'neutral': [
-            "Thanks for sharing. Anything else you'd like to add?",
-            "Got it. Want to dive deeper or change the topic?",
-            "Okay — how can I help further?"
-        ],
-        'fear': [
-            "That sounds scary. Do you want to describe what's worrying you?",
-            "I'm here with you — would you like some coping suggestions?",
-            "It's okay to be nervous. Want grounding or breathing exercise ideas?"
-        ],
-        'surprise': [
-            "Wow — that is surprising! Tell me more!",
-            "That's unexpected — how do you feel about it?",
-            "Interesting! What happened next?"
-        ],
-        'disgust': [
-            "That sounds unpleasant. Want to talk about it?",
-            "I get why you'd feel that way. Do you want a change of topic?",
-            "Ugh — I hear you. Anything I can do to help?"
-        ],
-    }
-    return random.choice(templates.get(broad_mood, templates['neutral']))
-
-# --- Load or train model at startup ---
-print("[app] Starting up, loading or training model...")
-model, le = load_model(MODEL_PATH, LE_PATH)
-
-if model is None or le is None:
-    texts, labels = load_dataset(DEFAULT_CSV_PATH)
-    if texts is None or labels is None:
-        print("[app] Using fallback sample dataset.")
-        texts, labels = fallback_sample()
-    model, le = build_and_train(texts, labels, save_to=MODEL_PATH, le_save_to=LE_PATH)
-else:
-    print("[app] Model and label encoder loaded from disk.")
+    t = _TEMPLATES[_BROAD_INDEX.get(broad_mood, _NEUTRAL_IDX)]
+    return t[random.randrange(len(t))]
 
+# --- Load or train model at startup (or connect to the inference server) ---
+_BROAD_BY_LABEL = {}
+
+if INFERENCE_URL:
+    import httpx
+
+    print(f"[app] Using inference server at {INFERENCE_URL}")
+    inference_client = httpx.Client(base_url=INFERENCE_URL, timeout=5.0)
+
+    def infer_mood(text):
+        """Return (mood_label, confidence) from the remote inference server."""
+        resp = inference_client.post("/predict", json={"text": text})
+        resp.raise_for_status()
+        result = resp.json()
+        return result["mood"], result["confidence"]
+else:
+    print("[app] Starting up, loading or training model...")
+    model, le = load_or_train(MODEL_PATH, LE_PATH, DEFAULT_CSV_PATH)
+
+    # Concurrent /chat requests are coalesced into a single predict_proba call
+    predictor = MoodPredictor(model, le)
+    infer_mood = DynamicBatcher(predictor.predict_batch, max_batch_size=32, max_latency_ms=10)
+
+    # Broad mood for every label the model can emit, so /chat skips to_broad
+    _BROAD_BY_LABEL.update({str(c): to_broad(c) for c in le.classes_})
+
+@cache.memoize(timeout=3600)
+def predict_mood(msg_normalized):
+    """Return (mood_label, broad_mood, confidence), cached per normalized message."""
+    mood_label, confidence = infer_mood(msg_normalized)
+    mood_label = str(mood_label)
+    broad = _BROAD_BY_LABEL.get(mood_label) or to_broad(mood_label)
+    return mood_label, broad, confidence
+
+def warmup():
+    """Warm the local prediction path (if any) and the /feedback sentiment scorer."""
+    if not INFERENCE_URL:
+        predictor.warmup()
+    sentiment.warmup()
+
+warmup()
 print("[app] Ready.")
 
 # --- Routes ---
@@ -118,17 +154,9 @@ def chat():
     if not user_msg:
         return jsonify({"error": "Empty message"}), 400
     try:
-        # Predict mood
-        if hasattr(model, "predict_proba"):
-            probs = model.predict_proba([user_msg])[0]
-            pred_idx = probs.argmax()
-            confidence = float(probs[pred_idx])
-        else:
-            pred_idx = int(model.predict([user_msg])[0])
-            confidence = None
-
-        mood_label = le.inverse_transform([pred_idx])[0]
-        broad = to_broad(mood_label)
+        # Predict mood (cached; batched in-process or via the inference server).
+        # The vectorizer lowercases anyway, so this only improves the hit rate.
+        mood_label, broad, confidence = predict_mood(user_msg.lower())
         reply = generate_reply(broad, user_msg)
 
         response = {
@@ -166,11 +194,8 @@ def feedback():
         # Perform sentiment analysis
         sentiment = analyze_sentiment(user_feedback)
 
-        # Ensure feedback_log.csv exists and append entry
-        os.makedirs(os.path.dirname(FEEDBACK_LOG), exist_ok=True)
-        with open(FEEDBACK_LOG, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([user_feedback, predicted, actual, sentiment])
+        # Queue the entry; it is appended to feedback_log.csv in the background
+        feedback_writer.write([user_feedback, predicted, actual, sentiment])
 
         return jsonify({
             "message": "Feedback received successfully",
@@ -184,5 +209,7 @@ def feedback():
 
 
 # --- Run app ---
+# Development server only. For production use gunicorn:
+#   gunicorn -c gunicorn.conf.py app:app
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,76 @@
+# feedback_log.py
+import atexit
+import csv
+import io
+import os
+import queue
+import threading
+import time
+
+
+class FeedbackLogWriter:
+    """
+    Appends feedback rows to a CSV file from a background thread.
+
+    write() only enqueues the row; the worker keeps the file open and flushes
+    every flush_rows rows or flush_interval_ms, whichever comes first. Each
+    batch goes to disk as a single append, so rows from several server
+    processes sharing the file never interleave mid-row.
+    """
+
+    def __init__(self, path, flush_rows=100, flush_interval_ms=100):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        atexit.register(self.close)
+
+    def _ensure_worker(self):
+        # Started lazily so that forked server workers get their own thread.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="feedback-log", daemon=True)
+                self._thread.start()
+
+    def write(self, row):
+        self._ensure_worker()
+        self._queue.put(row)
+
+    def close(self, timeout=2.0):
+        """Flush pending rows and stop the worker."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        # Unbuffered binary append: one os-level write per batch
+        with open(self.path, "ab", buffering=0) as f:
+            while True:
+                row = self._queue.get()
+                if row is None:
+                    break
+                batch = [row]
+                stop = False
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.flush_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if row is None:
+                        stop = True
+                        break
+                    batch.append(row)
+                buf = io.StringIO(newline="")
+                csv.writer(buf).writerows(batch)
+                f.write(buf.getvalue().encode("utf-8"))
+                if stop:
+                    break
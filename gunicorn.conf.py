@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+# Production server config. Run with:   gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+
+bind = "0.0.0.0:5000"
+
+# Separate processes let CPU-bound predictions run in parallel despite the GIL
+workers = multiprocessing.cpu_count() * 2 + 1
+
+# Threaded workers rather than gevent: the /chat batcher and the feedback
+# writer coordinate through real threads and queue.Queue, which would block
+# the whole gevent hub if they were created before monkey-patching.
+worker_class = "gthread"
+threads = 4
+
+# Load (or train) the model once in the master; workers share its pages
+# copy-on-write after fork instead of each loading their own copy.
+preload_app = True
+
+timeout = 60
+
+
+def post_fork(server, worker):
+    # Thread pools and lazy state do not survive fork, so warm each worker's copy.
+    from app import warmup
+    warmup()
@@ -0,0 +1,43 @@
+# inference_server.py
+# Standalone model server: owns the mood model so the Flask frontend only
+# handles HTTP and feedback logging.
+#
+# Run with:   uvicorn inference_server:app --host 127.0.0.1 --port 8000 --workers 4
+# Then start the frontend with INFERENCE_URL=http://127.0.0.1:8000 python app.py
+
+from typing import Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from batching import DynamicBatcher
+from model_utils import load_or_train, DEFAULT_CSV_PATH, MoodPredictor
+
+MODEL_PATH = "models/mood_model.joblib"
+LE_PATH = "models/label_encoder.joblib"
+
+# Load once per worker process, serve many requests
+print("[inference_server] Loading model...")
+model, le = load_or_train(MODEL_PATH, LE_PATH, DEFAULT_CSV_PATH)
+predictor = MoodPredictor(model, le)
+predictor.warmup()
+predict_mood = DynamicBatcher(predictor.predict_batch, max_batch_size=32, max_latency_ms=10)
+print("[inference_server] Ready.")
+
+app = FastAPI(title="FeelSense inference server")
+
+
+class PredictRequest(BaseModel):
+    text: str
+
+
+class PredictResponse(BaseModel):
+    mood: str
+    confidence: Optional[float] = None
+
+
+# Plain `def` so FastAPI runs it in its threadpool, letting requests batch up
+@app.post("/predict", response_model=PredictResponse)
+def predict(req: PredictRequest):
+    mood, confidence = predict_mood(req.text)
+    return PredictResponse(mood=mood, confidence=confidence)
@@ -1,25 +1,27 @@
 # model_utils.py
 import os
-import pandas as pd
+import numpy as np
+from scipy.special import expit
 from sklearn.pipeline import Pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
 # NEW: Import the SGDClassifier for better performance in text classification
 from sklearn.linear_model import LogisticRegression, SGDClassifier 
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
 from joblib import dump, load
-from numpy import unique # Added to help get all unique classes
+# pandas, train_test_split and classification_report are only needed for
+# training, so they are imported inside load_dataset / build_and_train to keep
+# app startup light when a saved model exists.
 
 DEFAULT_CSV_PATH = "data/emotion.csv"
 
-def detect_columns(df):
+def match_column_names(columns):
+    """Find the text and label columns by name only (None where no name matches)."""
     text_names = ['text','message','sentence','utterance','input','review','content','msg']
     label_names = ['mood','label','sentiment','emotion','target','class']
     text_col = None
     label_col = None
 
-    cols_lower = {c.lower(): c for c in df.columns}
+    cols_lower = {str(c).lower(): c for c in columns}
     for name in text_names:
         if name in cols_lower:
             text_col = cols_lower[name]
@@ -28,16 +30,18 @@ def detect_columns(df):
         if name in cols_lower:
             label_col = cols_lower[name]
             break
+    return text_col, label_col
+
+def detect_columns(df):
+    text_col, label_col = match_column_names(df.columns)
 
-    if text_col is None:
+    if text_col is None or label_col is None:
+        obj_cols = list(df.select_dtypes(include=["object", "string"]).columns)
         # pick the first object dtype column as text
-        obj_cols = [c for c in df.columns if df[c].dtype == object]
-        if len(obj_cols) >= 1:
+        if text_col is None and len(obj_cols) >= 1:
             text_col = obj_cols[0]
-    if label_col is None:
         # pick second object dtype column as label if exists
-        obj_cols = [c for c in df.columns if df[c].dtype == object]
-        if len(obj_cols) >= 2:
+        if label_col is None and len(obj_cols) >= 2:
             label_col = obj_cols[1]
 
     return text_col, label_col
@@ -46,21 +50,44 @@ def load_dataset(path=DEFAULT_CSV_PATH):
     if not os.path.exists(path):
         print(f"[model_utils] CSV not found at {path}")
         return None, None
-    df = pd.read_csv(path)
-    text_col, label_col = detect_columns(df)
+    import pandas as pd
+    # If the header names identify both columns, read only those two columns;
+    # otherwise the dtype-based fallback needs the full frame.
+    text_col, label_col = match_column_names(pd.read_csv(path, nrows=0).columns)
+    if text_col is not None and label_col is not None:
+        df = pd.read_csv(path, usecols=[text_col, label_col])
+    else:
+        df = pd.read_csv(path)
+        text_col, label_col = detect_columns(df)
     if text_col is None or label_col is None:
         print("[model_utils] Could not auto-detect columns. Please ensure CSV has 'text' and 'mood' (or similar).")
         return None, None
     df = df[[text_col, label_col]].dropna()
     df.columns = ['text', 'label']
     # drop empty texts
-    df = df[df['text'].str.strip().astype(bool)]
+    df['text'] = df['text'].astype(str).str.strip()
+    df = df[df['text'].str.len() > 0]
     if df.shape[0] < 10:
         print("[model_utils] Dataset too small after cleaning:", df.shape[0])
         return None, None
     return df['text'].tolist(), df['label'].tolist()
 
+def compact_classifier(pipeline):
+    """
+    Store the final classifier's weights as float32. Only the argmax and the
+    relative scores matter at inference, and the smaller matrix halves the
+    memory read on every predict.
+    """
+    clf = pipeline.steps[-1][1] if hasattr(pipeline, "steps") else pipeline
+    for attr in ("coef_", "intercept_"):
+        if hasattr(clf, attr):
+            setattr(clf, attr, getattr(clf, attr).astype(np.float32, copy=False))
+    return pipeline
+
 def build_and_train(texts, labels, save_to="models/mood_model.joblib", le_save_to="models/label_encoder.joblib"):
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import classification_report
+
     os.makedirs(os.path.dirname(save_to), exist_ok=True)
     le = LabelEncoder()
     y = le.fit_transform(labels)
@@ -68,7 +95,7 @@ def build_and_train(texts, labels, save_to="models/mood_model.joblib", le_save_t
     # UPDATED PIPELINE: Added class_weight='balanced' to compensate for the joy bias
     pipeline = Pipeline([
         # sublinear_tf=True helps boost the signal of less frequent sentiment words
-        ("tfidf", TfidfVectorizer(ngram_range=(1,2), max_features=15000, sublinear_tf=True)), 
+        ("tfidf", TfidfVectorizer(ngram_range=(1,2), max_features=15000, sublinear_tf=True, dtype=np.float32)),
         # FIX: class_weight='balanced' automatically weights less frequent classes (like fear/sadness) 
         # higher, penalizing the model for incorrectly predicting the majority class (joy).
         ("clf", SGDClassifier(loss='log_loss', max_iter=1200, tol=1e-3, class_weight='balanced'))
@@ -77,6 +104,7 @@ def build_and_train(texts, labels, save_to="models/mood_model.joblib", le_save_t
     # Kept the non-stratified split to avoid crashing on single-sample moods
     X_train, X_test, y_train, y_test = train_test_split(texts, y, test_size=0.15, random_state=42)
     pipeline.fit(X_train, y_train)
+    compact_classifier(pipeline)
 
     # Evaluation
     preds = pipeline.predict(X_test)
@@ -91,18 +119,118 @@ def build_and_train(texts, labels, save_to="models/mood_model.joblib", le_save_t
                                 labels=all_numeric_labels, 
                                 zero_division=0)) # zero_division=0 ensures we don't crash if a mood has zero samples
 
+    # The model is saved uncompressed so load_model can memory-map its arrays;
+    # joblib cannot mmap compressed files. The label encoder is tiny.
     dump(pipeline, save_to)
-    dump(le, le_save_to)
+    dump(le, le_save_to, compress=3)
     print(f"[model_utils] Saved model to {save_to} and label encoder to {le_save_to}")
     return pipeline, le
 
 def load_model(model_path="models/mood_model.joblib", le_path="models/label_encoder.joblib"):
     if not os.path.exists(model_path) or not os.path.exists(le_path):
         return None, None
-    model = load(model_path)
+    # mmap_mode='r' backs coef_/intercept_/idf_ with the OS page cache, so
+    # gunicorn workers share one physical copy. Models saved by build_and_train
+    # already store float32 weights, which compact_classifier leaves mapped;
+    # an older float64 model gets a private float32 copy in each process.
+    model = compact_classifier(load(model_path, mmap_mode="r"))
     le = load(le_path)
     return model, le
 
+def load_or_train(model_path="models/mood_model.joblib", le_path="models/label_encoder.joblib", csv_path=DEFAULT_CSV_PATH):
+    """Load the saved model, training (and saving) a new one if it is missing."""
+    model, le = load_model(model_path, le_path)
+    if model is not None and le is not None:
+        print("[model_utils] Model and label encoder loaded from disk.")
+        return model, le
+    texts, labels = load_dataset(csv_path)
+    if texts is None or labels is None:
+        print("[model_utils] Using fallback sample dataset.")
+        texts, labels = fallback_sample()
+    return build_and_train(texts, labels, save_to=model_path, le_save_to=le_path)
+
+class MoodPredictor:
+    """Wraps the trained pipeline and label encoder for batched inference."""
+
+    def __init__(self, model, le):
+        self.model = model
+        self.le = le
+        # Split the pipeline into featurizer (tf-idf) and classifier so the
+        # classifier's decision scores can be used directly.
+        if hasattr(model, "steps") and len(model.steps) > 1:
+            self.featurizer = model[:-1]
+            self.clf = model[-1]
+        else:
+            self.featurizer = None
+            self.clf = model
+        # _predict_from_scores reproduces only SGDClassifier(log_loss)'s
+        # predict_proba; every other estimator goes through predict_proba.
+        self.use_scores = isinstance(self.clf, SGDClassifier) and self.clf.loss == "log_loss"
+
+    def predict_batch(self, texts):
+        """Return a (mood_label, confidence) tuple for each text, in order."""
+        texts = list(texts)
+        X = self.featurizer.transform(texts) if self.featurizer is not None else texts
+        if self.use_scores:
+            pred_idx, confidences = self._predict_from_scores(self.clf.decision_function(X))
+        elif hasattr(self.clf, "predict_proba"):
+            probs = self.clf.predict_proba(X)
+            pred_idx = probs.argmax(axis=1)
+            confidences = [float(p[i]) for p, i in zip(probs, pred_idx)]
+        else:
+            pred_idx = self.clf.predict(X).astype(int)
+            confidences = [None] * len(texts)
+        # classes_ is already a numpy array; index it instead of inverse_transform
+        labels = self.le.classes_[pred_idx]
+        return [(str(label), conf) for label, conf in zip(labels, confidences)]
+
+    def _predict_from_scores(self, scores):
+        """
+        Argmax class and its probability straight from the decision scores.
+        Matches SGDClassifier(loss='log_loss').predict_proba: sigmoid of the
+        score for binary problems, and one-vs-rest sigmoids normalized to sum
+        to one for multiclass, without building the full probability matrix.
+        """
+        if scores.ndim == 1:
+            pos = scores > 0
+            p_pos = expit(scores)
+            pred = pos.astype(int)
+            conf = np.where(pos, p_pos, 1.0 - p_pos)
+        else:
+            pred = scores.argmax(axis=1)
+            sig = expit(scores)
+            total = sig.sum(axis=1)
+            rows = np.arange(scores.shape[0])
+            # predict_proba falls back to uniform when every sigmoid underflows
+            conf = np.where(total > 0, sig[rows, pred] / np.where(total > 0, total, 1.0), 1.0 / scores.shape[1])
+        return self.clf.classes_[pred], [float(c) for c in conf]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def check_confidence(self, texts):
+        """
+        Verify that the decision-score shortcut reports the same confidence as
+        predict_proba(...).max(axis=1); disable the shortcut if it does not.
+        """
+        if not self.use_scores:
+            return True
+        texts = list(texts)
+        confidences = [conf for _, conf in self.predict_batch(texts)]
+        expected = self.model.predict_proba(texts).max(axis=1)
+        if np.allclose(confidences, expected, rtol=1e-5, atol=1e-6):
+            return True
+        print("[model_utils] Decision-score confidence differs from predict_proba; using predict_proba.")
+        self.use_scores = False
+        return False
+
+    def warmup(self):
+        """Run one throwaway prediction so lazy imports and BLAS setup happen before the first request."""
+        try:
+            self.check_confidence(["warmup text", "I feel so happy today", "I am scared and sad"])
+        except Exception as e:
+            print("[model_utils] Warmup prediction failed:", e)
+
 # small fallback dataset to allow app to run if CSV missing
 def fallback_sample():
     texts = [
@@ -0,0 +1,134 @@
+# sentiment.py
+# Lightweight lexicon-based polarity scoring for user feedback.
+import csv
+import re
+
+import numpy as np
+
+# VADER's lexicon (MIT, see data/vader_LICENSE.txt), plus project-specific
+# additions/overrides for feedback about predictions ("off", "garbage", ...)
+VADER_LEXICON_PATH = "data/vader_lexicon.txt"
+LEXICON_PATH = "data/sentiment_lexicon.csv"
+
+# VADER rates words from -4 to 4; scores are rescaled to -1.0 .. 1.0
+VADER_SCALE = 4.0
+
+# Emoticons first so ":)" is not split into punctuation
+TOKEN_RE = re.compile(r"</?3|[:;]'?-?[()\[\]dp*]|[a-z]+(?:'[a-z]+)?")
+
+# Words that flip (and dampen) the polarity of the next sentiment word
+NEGATIONS = {"not", "no", "never", "isn't", "wasn't", "don't", "didn't", "doesn't", "can't", "won't"}
+NEGATION_FACTOR = -0.5
+
+def load_vader_lexicon(path=VADER_LEXICON_PATH):
+    """Read VADER's tab-separated lexicon (token, mean rating, ...) as word -> polarity."""
+    lexicon = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\r\n").split("\t")
+            if len(parts) >= 2:
+                lexicon[parts[0]] = float(parts[1]) / VADER_SCALE
+    return lexicon
+
+def load_lexicon(path=LEXICON_PATH, vader_path=VADER_LEXICON_PATH):
+    """Read the word -> polarity (-1.0 .. 1.0) lexicon: VADER, overridden by the project CSV."""
+    lexicon = load_vader_lexicon(vader_path)
+    with open(path, newline="", encoding="utf-8") as f:
+        lexicon.update({row["word"]: float(row["polarity"]) for row in csv.DictReader(f)})
+    return lexicon
+
+def _hash_tokens(tokens):
+    return np.fromiter((hash(t) for t in tokens), dtype=np.int64, count=len(tokens))
+
+def _encode_lexicon(lexicon):
+    """Encode the lexicon as (sorted word hashes, matching scores) arrays."""
+    words = [w for w in lexicon if w not in NEGATIONS]
+    hashes = _hash_tokens(words)
+    order = np.argsort(hashes)
+    scores = np.array([lexicon[w] for w in words], dtype=np.float64)
+    return hashes[order], scores[order]
+
+_LEXICON = None
+
+def get_lexicon():
+    """
+    Load the lexicon on first use and cache it for the process as sorted
+    hash/score arrays. str hashes are salted per process, which is fine since
+    the arrays are never shared between processes.
+    """
+    global _LEXICON
+    if _LEXICON is None:
+        hashes, scores = _encode_lexicon(load_lexicon())
+        negations = np.sort(_hash_tokens(list(NEGATIONS)))
+        _LEXICON = (hashes, scores, negations)
+    return _LEXICON
+
+def _score_batch(hashes, scores, negations, token_hashes, offsets, negation_factor):
+    """Mean polarity per text; text k owns token_hashes[offsets[k]:offsets[k + 1]]."""
+    out = np.zeros(offsets.size - 1)
+    for k in range(offsets.size - 1):
+        total = 0.0
+        hits = 0
+        negate = False
+        for t in range(offsets[k], offsets[k + 1]):
+            h = token_hashes[t]
+            j = np.searchsorted(negations, h)
+            is_negation = j < negations.size and negations[j] == h
+            i = np.searchsorted(hashes, h)
+            if not is_negation and i < hashes.size and hashes[i] == h:
+                total += scores[i] * negation_factor if negate else scores[i]
+                hits += 1
+            negate = is_negation
+        if hits:
+            out[k] = total / hits
+    return out
+
+_SCORER = None
+
+def get_scorer():
+    """
+    JIT-compile _score_batch with numba on first use. numba is imported here
+    rather than at module level so importing this module stays cheap; without
+    numba the plain Python function is used.
+    """
+    global _SCORER
+    if _SCORER is None:
+        try:
+            from numba import njit
+            _SCORER = njit(cache=True)(_score_batch)
+        except ImportError:  # numba is optional
+            _SCORER = _score_batch
+    return _SCORER
+
+def polarity_batch(texts):
+    """Mean polarity of the sentiment-bearing tokens of each text (0.0 if none)."""
+    hashes, scores, negations = get_lexicon()
+    tokens = [TOKEN_RE.findall(t.lower()) for t in texts]
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(toks) for toks in tokens], out=offsets[1:])
+    token_hashes = _hash_tokens([tok for toks in tokens for tok in toks])
+    return get_scorer()(hashes, scores, negations, token_hashes, offsets, NEGATION_FACTOR)
+
+def polarity(text):
+    """Mean polarity of the sentiment-bearing tokens in text (0.0 if none)."""
+    return float(polarity_batch([text])[0])
+
+def _label(p):
+    if p > 0.1:
+        return "positive"
+    elif p < -0.1:
+        return "negative"
+    else:
+        return "neutral"
+
+def analyze_sentiment_batch(feedback_texts):
+    """Analyze sentiment of several feedback texts in one pass."""
+    return [_label(p) for p in polarity_batch(feedback_texts)]
+
+def warmup():
+    """Load the lexicon and compile the scorer so the first /feedback call does not pay for it."""
+    analyze_sentiment_batch(["warmup :)"])
+
+def analyze_sentiment(feedback_text):
+    """Analyze sentiment polarity of feedback."""
+    return _label(polarity(feedback_text))